@@ -1,17 +1,102 @@
 from __future__ import annotations
 
+import ast
+import copy
 import datetime
 import enum
 import dataclasses
+import functools
 import numbers
+import sys
+import types
 import typing as t
 
 
 _MISSING = dataclasses.MISSING
 
+# Schema builders, keyed by the root dataclass. Nested schemas are not cached
+# on their own since they depend on the root (e.g. `{"$ref": "#"}`). Builders
+# return fresh containers on every call, so while building, dicts and lists
+# may be shared within and between schemas (e.g. `$defs` entries, `$ref`s).
+_BUILDERS: dict[t.Any, t.Callable[[], dict[str, t.Any]]] = {}
+
 
 def get_schema(dc):
-    return _GetSchema()(dc)
+    try:
+        builder = _BUILDERS[dc]
+    except KeyError:
+        builder = _BUILDERS[dc] = _compile_builder(_GetSchema()(dc))
+    return builder()
+
+
+def _compile_builder(schema):
+    """Compile a function returning a fresh copy of `schema`.
+
+    Dicts, lists and tuples become literals in the function's AST, so each
+    call creates new containers. Immutable scalars are inlined as constants;
+    any other value is bound into the function's namespace and deep-copied.
+    """
+    namespace = {"_deepcopy": copy.deepcopy}
+
+    def to_node(value):
+        if isinstance(value, dict):
+            return ast.Dict(
+                keys=[to_node(k) for k in value],
+                values=[to_node(v) for v in value.values()],
+            )
+        elif isinstance(value, list):
+            return ast.List(elts=[to_node(v) for v in value], ctx=ast.Load())
+        elif type(value) is tuple:
+            return ast.Tuple(elts=[to_node(v) for v in value], ctx=ast.Load())
+        elif value is None or type(value) in (str, int, float, bool):
+            return ast.Constant(value)
+        else:
+            name = f"_{len(namespace)}"
+            namespace[name] = value
+            return ast.Call(
+                func=ast.Name(id="_deepcopy", ctx=ast.Load()),
+                args=[ast.Name(id=name, ctx=ast.Load())],
+                keywords=[],
+            )
+
+    no_args = ast.arguments(
+        posonlyargs=[], args=[], kwonlyargs=[], kw_defaults=[], defaults=[]
+    )
+    try:
+        tree = ast.Expression(body=ast.Lambda(args=no_args, body=to_node(schema)))
+        code = compile(ast.fix_missing_locations(tree), "<dc_schema>", "eval")
+    except (RecursionError, MemoryError):
+        # Too deeply nested to compile, fall back to copying.
+        return functools.partial(_copy, schema)
+    return eval(code, namespace)
+
+
+def _copy(value):
+    if isinstance(value, dict):
+        return {k: _copy(v) for k, v in value.items()}
+    elif isinstance(value, list):
+        return [_copy(v) for v in value]
+    elif type(value) is tuple:
+        return tuple(_copy(v) for v in value)
+    elif value is None or type(value) in (str, int, float, bool):
+        return value
+    else:
+        return copy.deepcopy(value)
+
+
+@functools.lru_cache(maxsize=None)
+def _get_fields(dc):
+    """`(name, type, default, is_required)` for each field of the dataclass."""
+    type_hints = t.get_type_hints(dc, include_extras=True)
+    return tuple(
+        (
+            field.name,
+            type_hints[field.name],
+            field.default,
+            field.default is _MISSING and field.default_factory is _MISSING,
+        )
+        for field in dataclasses.fields(dc)
+    )
 
 
 _Format = t.Literal[
@@ -33,6 +118,27 @@ _Format = t.Literal[
 ]
 
 
+# (attribute, JSON schema keyword) pairs, in the order they are emitted.
+_ANNOTATION_KEYS = (
+    ("title", "title"),
+    ("description", "description"),
+    ("examples", "examples"),
+    ("deprecated", "deprecated"),
+    ("min_length", "minLength"),
+    ("max_length", "maxLength"),
+    ("pattern", "pattern"),
+    ("format", "format"),
+    ("minimum", "minimum"),
+    ("maximum", "maximum"),
+    ("exclusive_minimum", "exclusiveMinimum"),
+    ("exclusive_maximum", "exclusiveMaximum"),
+    ("multiple_of", "multipleOf"),
+    ("min_items", "minItems"),
+    ("max_items", "maxItems"),
+    ("unique_items", "uniqueItems"),
+)
+
+
 @dataclasses.dataclass(frozen=True)
 class SchemaAnnotation:
     title: t.Optional[str] = None
@@ -53,21 +159,57 @@ class SchemaAnnotation:
     unique_items: t.Optional[bool] = None
 
     def schema(self):
-        key_map = {
-            "min_length": "minLength",
-            "max_length": "maxLength",
-            "exclusive_minimum": "exclusiveMinimum",
-            "exclusive_maximum": "exclusiveMaximum",
-            "multiple_of": "multipleOf",
-            "min_items": "minItems",
-            "max_items": "maxItems",
-            "unique_items": "uniqueItems",
-        }
-        return {
-            key_map.get(k, k): v
-            for k, v in dataclasses.asdict(self).items()
-            if v is not None
-        }
+        return {k: _copy(v) for k, v in self._schema.items()}
+
+    @functools.cached_property
+    def _schema(self):
+        schema = {}
+        for attr, key in _ANNOTATION_KEYS:
+            value = getattr(self, attr)
+            if value is not None:
+                schema[key] = value
+        return schema
+
+
+_DEFAULT_ANNOTATION = SchemaAnnotation()
+
+
+@functools.lru_cache(maxsize=None)
+def _get_enum_def(enum_):
+    return {"title": enum_.__name__, "enum": [v.value for v in enum_]}
+
+
+def _to_json(value):
+    # Defaults and literal values may hold enum members or tuples, which are
+    # not JSON types.
+    if isinstance(value, enum.Enum):
+        return value.value
+    elif isinstance(value, (tuple, list)):
+        return [_to_json(v) for v in value]
+    else:
+        return value
+
+
+def _merge(schema, annotation):
+    if annotation is not _DEFAULT_ANNOTATION:
+        schema.update(annotation._schema)
+    return schema
+
+
+# Schemas of primitive fields without a default or annotation.
+_PRIMITIVE_SCHEMAS = {
+    type_: {"type": type_}
+    for type_ in ("null", "string", "boolean", "integer", "number")
+}
+
+
+def _get_primitive_schema(type_, default, annotation):
+    if default is _MISSING and annotation is _DEFAULT_ANNOTATION:
+        return _PRIMITIVE_SCHEMAS[type_]
+    schema = {"type": type_}
+    if default is not _MISSING:
+        schema["default"] = default
+    return _merge(schema, annotation)
 
 
 class _GetSchema:
@@ -76,7 +218,8 @@ class _GetSchema:
         self.seen_root = False
 
         self.defs = {}
-        schema = self.get_dc_schema(dc, SchemaAnnotation())
+        self.refs = {}
+        schema = self.get_dc_schema(dc, _DEFAULT_ANNOTATION)
         if self.defs:
             schema["$defs"] = self.defs
 
@@ -86,9 +229,9 @@ class _GetSchema:
         }
 
     def get_dc_schema(self, dc, annotation):
-        if dc == self.root:
+        if dc is self.root:
             if self.seen_root:
-                return {"allOf": [{"$ref": "#"}], **annotation.schema()}
+                return _merge({"allOf": self.get_ref("#")}, annotation)
             else:
                 self.seen_root = True
                 schema = self.create_dc_schema(dc)
@@ -97,225 +240,190 @@ class _GetSchema:
             if dc.__name__ not in self.defs:
                 schema = self.create_dc_schema(dc)
                 self.defs[dc.__name__] = schema
-            return {
-                "allOf": [{"$ref": f"#/$defs/{dc.__name__}"}],
-                **annotation.schema(),
-            }
+            return _merge({"allOf": self.get_def_ref(dc)}, annotation)
+
+    def get_ref(self, ref):
+        try:
+            return self.refs[ref]
+        except KeyError:
+            all_of = self.refs[ref] = [{"$ref": ref}]
+            return all_of
+
+    def get_def_ref(self, type_):
+        return self.get_ref(f"#/$defs/{type_.__name__}")
 
     def create_dc_schema(self, dc):
         if hasattr(dc, "SchemaConfig"):
-            annotation = getattr(dc.SchemaConfig, "annotation", SchemaAnnotation())
+            annotation = getattr(dc.SchemaConfig, "annotation", _DEFAULT_ANNOTATION)
         else:
-            annotation = SchemaAnnotation()
-        schema = {
-            "type": "object",
-            "title": dc.__name__,
-            **annotation.schema(),
-            "properties": {},
-            "required": [],
+            annotation = _DEFAULT_ANNOTATION
+        schema = _merge({"type": "object", "title": dc.__name__}, annotation)
+        fields = _get_fields(dc)
+        schema["properties"] = {
+            name: self.get_field_schema(type_, default, _DEFAULT_ANNOTATION)
+            for name, type_, default, _ in fields
         }
-        type_hints = t.get_type_hints(dc, include_extras=True)
-        for field in dataclasses.fields(dc):
-            type_ = type_hints[field.name]
-            schema["properties"][field.name] = self.get_field_schema(
-                type_, field.default, SchemaAnnotation()
-            )
-            field_is_optional = (
-                field.default is not _MISSING or field.default_factory is not _MISSING
-            )
-            if not field_is_optional:
-                schema["required"].append(field.name)
-        if not schema["required"]:
-            schema.pop("required")
+        required = [name for name, _, _, is_required in fields if is_required]
+        if required:
+            schema["required"] = required
         return schema
 
     def get_field_schema(self, type_, default, annotation):
-        if dataclasses.is_dataclass(type_):
+        if type(type_) is types.GenericAlias:
+            # Builtin generics (list[int], ...), skip t.get_origin's checks.
+            origin = type_.__origin__
+        else:
+            origin = t.get_origin(type_)
+        if origin is not None:
+            handler = self._ORIGIN_HANDLERS.get(origin)
+        elif dataclasses.is_dataclass(type_):
             return self.get_dc_schema(type_, annotation)
-        if t.get_origin(type_) == t.Union:
-            return self.get_union_schema(type_, default, annotation)
-        if t.get_origin(type_) == t.Literal:
-            return self.get_literal_schema(type_, default, annotation)
-        if t.get_origin(type_) == t.Annotated:
-            return self.get_annotated_schema(type_, default)
-        elif type_ == dict or t.get_origin(type_) == dict:
-            return self.get_dict_schema(type_, annotation)
-        elif type_ == list or t.get_origin(type_) == list:
-            return self.get_list_schema(type_, annotation)
-        elif type_ == tuple or t.get_origin(type_) == tuple:
-            return self.get_tuple_schema(type_, default, annotation)
-        elif type_ == set or t.get_origin(type_) == set:
-            return self.get_set_schema(type_, annotation)
-        elif type_ is None or type_ == type(None):
-            return self.get_none_schema(default, annotation)
-        elif type_ == str:
-            return self.get_str_schema(default, annotation)
-        elif type_ == bool:
-            return self.get_bool_schema(default, annotation)
-        elif type_ == int:
-            return self.get_int_schema(default, annotation)
+        else:
+            handler = self._TYPE_HANDLERS.get(type_)
+        if handler is not None:
+            return handler(self, type_, default, annotation)
+        elif not isinstance(type_, type):
+            raise NotImplementedError(f"field type '{type_}' not implemented")
         elif issubclass(type_, numbers.Number):
-            return self.get_number_schema(default, annotation)
-        elif issubclass(type_, enum.Enum):
+            return self.get_number_schema(type_, default, annotation)
+        elif isinstance(type_, enum.EnumMeta):
             return self.get_enum_schema(type_, default, annotation)
         elif issubclass(type_, datetime.datetime):
-            return self.get_datetime_schema(annotation)
+            return self.get_datetime_schema(type_, default, annotation)
         elif issubclass(type_, datetime.date):
-            return self.get_date_schema(annotation)
+            return self.get_date_schema(type_, default, annotation)
         else:
             raise NotImplementedError(f"field type '{type_}' not implemented")
 
     def get_union_schema(self, type_, default, annotation):
         args = t.get_args(type_)
-        if default is _MISSING:
-            return {
-                "anyOf": [
-                    self.get_field_schema(arg, _MISSING, SchemaAnnotation())
-                    for arg in args
-                ],
-                **annotation.schema(),
-            }
-        else:
-            return {
-                "anyOf": [
-                    self.get_field_schema(arg, _MISSING, SchemaAnnotation())
-                    for arg in args
-                ],
-                "default": default,
-                **annotation.schema(),
-            }
+        schema = {
+            "anyOf": [
+                self.get_field_schema(arg, _MISSING, _DEFAULT_ANNOTATION)
+                for arg in args
+            ]
+        }
+        if default is not _MISSING:
+            schema["default"] = _to_json(default)
+        return _merge(schema, annotation)
 
     def get_literal_schema(self, type_, default, annotation):
-        if default is _MISSING:
-            schema = {**annotation.schema()}
-        else:
-            schema = {"default": default, **annotation.schema()}
-        args = t.get_args(type_)
-        return {"enum": list(args), **schema}
+        schema = {"enum": _to_json(t.get_args(type_))}
+        if default is not _MISSING:
+            schema["default"] = _to_json(default)
+        return _merge(schema, annotation)
 
-    def get_dict_schema(self, type_, annotation):
+    def get_dict_schema(self, type_, default, annotation):
         args = t.get_args(type_)
         assert len(args) in (0, 2)
+        schema = {"type": "object"}
         if args:
-            assert args[0] == str
-            return {
-                "type": "object",
-                "additionalProperties": self.get_field_schema(
-                    args[1], _MISSING, SchemaAnnotation()
-                ),
-                **annotation.schema(),
-            }
-        else:
-            return {"type": "object", **annotation.schema()}
+            assert args[0] is str
+            schema["additionalProperties"] = self.get_field_schema(
+                args[1], _MISSING, _DEFAULT_ANNOTATION
+            )
+        return _merge(schema, annotation)
 
-    def get_list_schema(self, type_, annotation):
+    def get_list_schema(self, type_, default, annotation):
         args = t.get_args(type_)
         assert len(args) in (0, 1)
+        schema = {"type": "array"}
         if args:
-            return {
-                "type": "array",
-                "items": self.get_field_schema(args[0], _MISSING, SchemaAnnotation()),
-                **annotation.schema(),
-            }
-        else:
-            return {"type": "array", **annotation.schema()}
+            schema["items"] = self.get_field_schema(
+                args[0], _MISSING, _DEFAULT_ANNOTATION
+            )
+        return _merge(schema, annotation)
 
     def get_tuple_schema(self, type_, default, annotation):
-        if default is _MISSING:
-            schema = {**annotation.schema()}
-        else:
-            schema = {"default": list(default), **annotation.schema()}
         args = t.get_args(type_)
-        if args and len(args) == 2 and args[1] is ...:
-            schema = {
-                "type": "array",
-                "items": self.get_field_schema(args[0], _MISSING, SchemaAnnotation()),
-                **schema,
-            }
+        schema = {"type": "array"}
+        if len(args) == 2 and args[1] is ...:
+            schema["items"] = self.get_field_schema(
+                args[0], _MISSING, _DEFAULT_ANNOTATION
+            )
         elif args:
-            schema = {
-                "type": "array",
-                "prefixItems": [
-                    self.get_field_schema(arg, _MISSING, SchemaAnnotation())
-                    for arg in args
-                ],
-                "minItems": len(args),
-                "maxItems": len(args),
-                **schema,
-            }
-        else:
-            schema = {"type": "array", **schema}
-        return schema
-
-    def get_set_schema(self, type_, annotation):
+            schema["prefixItems"] = [
+                self.get_field_schema(arg, _MISSING, _DEFAULT_ANNOTATION)
+                for arg in args
+            ]
+            schema["minItems"] = len(args)
+            schema["maxItems"] = len(args)
+        if default is not _MISSING:
+            schema["default"] = _to_json(default)
+        return _merge(schema, annotation)
+
+    def get_set_schema(self, type_, default, annotation):
         args = t.get_args(type_)
         assert len(args) in (0, 1)
+        schema = {"type": "array"}
         if args:
-            return {
-                "type": "array",
-                "items": self.get_field_schema(args[0], _MISSING, SchemaAnnotation()),
-                "uniqueItems": True,
-                **annotation.schema(),
-            }
-        else:
-            return {"type": "array", "uniqueItems": True, **annotation.schema()}
-
-    def get_none_schema(self, default, annotation):
-        if default is _MISSING:
-            return {"type": "null", **annotation.schema()}
-        else:
-            return {"type": "null", "default": default, **annotation.schema()}
+            schema["items"] = self.get_field_schema(
+                args[0], _MISSING, _DEFAULT_ANNOTATION
+            )
+        schema["uniqueItems"] = True
+        return _merge(schema, annotation)
 
-    def get_str_schema(self, default, annotation):
-        if default is _MISSING:
-            return {"type": "string", **annotation.schema()}
-        else:
-            return {"type": "string", "default": default, **annotation.schema()}
+    def get_none_schema(self, type_, default, annotation):
+        return _get_primitive_schema("null", default, annotation)
 
-    def get_bool_schema(self, default, annotation):
-        if default is _MISSING:
-            return {"type": "boolean", **annotation.schema()}
-        else:
-            return {"type": "boolean", "default": default, **annotation.schema()}
+    def get_str_schema(self, type_, default, annotation):
+        return _get_primitive_schema("string", default, annotation)
 
-    def get_int_schema(self, default, annotation):
-        if default is _MISSING:
-            return {"type": "integer", **annotation.schema()}
-        else:
-            return {"type": "integer", "default": default, **annotation.schema()}
+    def get_bool_schema(self, type_, default, annotation):
+        return _get_primitive_schema("boolean", default, annotation)
 
-    def get_number_schema(self, default, annotation):
+    def get_int_schema(self, type_, default, annotation):
+        return _get_primitive_schema("integer", default, annotation)
 
-        if default is _MISSING:
-            return {"type": "number", **annotation.schema()}
-        else:
-            return {"type": "number", "default": default, **annotation.schema()}
+    def get_number_schema(self, type_, default, annotation):
+        return _get_primitive_schema("number", default, annotation)
 
     def get_enum_schema(self, type_, default, annotation):
         if type_.__name__ not in self.defs:
-            self.defs[type_.__name__] = {
-                "title": type_.__name__,
-                "enum": [v.value for v in type_],
-            }
-        if default is _MISSING:
-            return {
-                "allOf": [{"$ref": f"#/$defs/{type_.__name__}"}],
-                **annotation.schema(),
-            }
-        else:
-            return {
-                "allOf": [{"$ref": f"#/$defs/{type_.__name__}"}],
-                "default": default.value,
-                **annotation.schema(),
-            }
-
-    def get_annotated_schema(self, type_, default):
-        args = t.get_args(type_)
-        assert len(args) == 2
-        return self.get_field_schema(args[0], default, args[1])
-
-    def get_datetime_schema(self, annotation):
-        return {"type": "string", "format": "date-time", **annotation.schema()}
-
-    def get_date_schema(self, annotation):
-        return {"type": "string", "format": "date", **annotation.schema()}
+            self.defs[type_.__name__] = _get_enum_def(type_)
+        schema = {"allOf": self.get_def_ref(type_)}
+        if default is not _MISSING:
+            schema["default"] = default.value
+        return _merge(schema, annotation)
+
+    def get_annotated_schema(self, type_, default, annotation):
+        # Other metadata in the `Annotated` is not ours to interpret, skip it.
+        for metadata in type_.__metadata__:
+            if isinstance(metadata, SchemaAnnotation):
+                annotation = metadata
+                break
+        return self.get_field_schema(type_.__origin__, default, annotation)
+
+    def get_datetime_schema(self, type_, default, annotation):
+        return _merge({"type": "string", "format": "date-time"}, annotation)
+
+    def get_date_schema(self, type_, default, annotation):
+        return _merge({"type": "string", "format": "date"}, annotation)
+
+    _TYPE_HANDLERS = {
+        dict: get_dict_schema,
+        list: get_list_schema,
+        tuple: get_tuple_schema,
+        set: get_set_schema,
+        None: get_none_schema,
+        type(None): get_none_schema,
+        str: get_str_schema,
+        bool: get_bool_schema,
+        int: get_int_schema,
+        float: get_number_schema,
+        complex: get_number_schema,
+        datetime.datetime: get_datetime_schema,
+        datetime.date: get_date_schema,
+    }
+
+    _ORIGIN_HANDLERS = {
+        t.Union: get_union_schema,
+        t.Literal: get_literal_schema,
+        t.Annotated: get_annotated_schema,
+        dict: get_dict_schema,
+        list: get_list_schema,
+        tuple: get_tuple_schema,
+        set: get_set_schema,
+    }
+    if sys.version_info >= (3, 10):
+        _ORIGIN_HANDLERS[types.UnionType] = get_union_schema
@@ -1,8 +1,18 @@
 import argparse
+import importlib.machinery
+import importlib.util
 import json
+import math
+import re
+import sys
 
 from dc_schema import get_schema
 
+try:
+    import orjson  # type: ignore
+except ImportError:
+    orjson = None  # type: ignore
+
 
 def main():
     arg_parser = argparse.ArgumentParser()
@@ -14,7 +24,57 @@ def main():
     )
     args = arg_parser.parse_args()
 
-    exec(open(args.file_path).read(), locals())
+    module = _load_module(args.file_path)
+
+    schema = get_schema(getattr(module, args.dataclass))
+    print(_dumps(schema), end=None)
+
+
+def _dumps(schema):
+    # orjson is an optional, much faster serializer. Its output must match
+    # json's, so it is skipped for floats it formats differently (non-finite
+    # or exponent form) and ints over 64 bits, and non-ASCII characters and
+    # DEL, which it writes raw, are escaped like json does.
+    if orjson is not None and _orjson_safe(schema):
+        try:
+            text = orjson.dumps(schema, option=orjson.OPT_INDENT_2).decode()
+        except TypeError:
+            pass
+        else:
+            if text.isascii() and "\x7f" not in text:
+                return text
+            return _NON_ASCII.sub(lambda m: json.dumps(m.group())[1:-1], text)
+    return json.dumps(schema, indent=2)
+
+
+_NON_ASCII = re.compile(r"[^\x00-\x7e]")
+
+
+def _orjson_safe(schema):
+    stack = [schema]
+    while stack:
+        value = stack.pop()
+        if type(value) is dict:
+            stack.extend(value.values())
+        elif type(value) in (list, tuple):
+            stack.extend(value)
+        elif type(value) is float:
+            if not math.isfinite(value) or "e" in repr(value):
+                return False
+    return True
+
 
-    schema = get_schema(locals()[args.dataclass])
-    print(json.dumps(schema, indent=2), end=None)
+def _load_module(file_path):
+    # Import the file as a module (rather than exec-ing its source) so its
+    # bytecode is cached in __pycache__ between runs. The module must be in
+    # sys.modules for typing.get_type_hints to resolve its annotations. The
+    # explicit loader lets files without a ".py" suffix load too.
+    module_name = "_dc_schema_cli_module"
+    loader = importlib.machinery.SourceFileLoader(module_name, file_path)
+    spec = importlib.util.spec_from_file_location(module_name, file_path, loader=loader)
+    if spec is None or spec.loader is None:
+        raise ImportError(f"cannot load '{file_path}'")
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[module_name] = module
+    spec.loader.exec_module(module)
+    return module
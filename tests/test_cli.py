@@ -0,0 +1,100 @@
+import json
+import sys
+
+import pytest
+
+from dc_schema import cli
+
+
+SCHEMA_PY = """\
+from __future__ import annotations
+
+import dataclasses
+import typing as t
+
+
+@dataclasses.dataclass
+class Book:
+    title: str = "Les Mis\xe9rables \\u2028"
+    rating: float = 4.5
+
+
+@dataclasses.dataclass
+class Author:
+    name: str
+    books: list[Book]
+    best: t.Optional[Book] = None
+"""
+
+
+@pytest.fixture
+def schema_py(tmp_path):
+    file_path = tmp_path / "schema.py"
+    file_path.write_text(SCHEMA_PY, encoding="utf-8")
+    return file_path
+
+
+def test_load_module(schema_py):
+    module = cli._load_module(str(schema_py))
+    assert module.__file__ == str(schema_py)
+    assert module.Author(name="a", books=[]).books == []
+
+
+def test_load_module_without_py_suffix(schema_py):
+    file_path = schema_py.rename(schema_py.with_suffix(""))
+    module = cli._load_module(str(file_path))
+    assert module.__file__ == str(file_path)
+    assert module.Author(name="a", books=[]).books == []
+
+
+def test_load_module_missing_file(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        cli._load_module(str(tmp_path / "missing.py"))
+
+
+@pytest.mark.parametrize("use_orjson", [False, True])
+def test_main(schema_py, monkeypatch, capsys, use_orjson):
+    if use_orjson:
+        orjson = pytest.importorskip("orjson")
+        orjson_dumps = orjson.dumps
+        dumps_calls = []
+
+        def dumps(*args, **kwargs):
+            dumps_calls.append(args)
+            return orjson_dumps(*args, **kwargs)
+
+        monkeypatch.setattr(cli.orjson, "dumps", dumps)
+    else:
+        monkeypatch.setattr(cli, "orjson", None)
+    monkeypatch.setattr(sys, "argv", ["dc_schema", str(schema_py), "Author"])
+    cli.main()
+    out = capsys.readouterr().out
+    assert out.isascii()
+    schema = json.loads(out)
+    assert schema["title"] == "Author"
+    assert schema["properties"]["best"]["anyOf"][0] == {
+        "allOf": [{"$ref": "#/$defs/Book"}]
+    }
+    book = schema["$defs"]["Book"]["properties"]
+    assert book["title"]["default"] == "Les Mis\xe9rables \u2028"
+    assert book["rating"]["default"] == 4.5
+    if use_orjson:
+        assert len(dumps_calls) == 1
+
+
+@pytest.mark.parametrize(
+    "schema",
+    [
+        {"a": {"b": [1, 2.5, None, True], "c": {}, "d": []}},
+        {"a": "Les Mis\xe9rables \u2028 \U0001f600 \x1f \x7f"},
+        {"a": "\x7f"},
+        {"a": [1e16, 1e-7, 5e-324, -0.0, 0.1]},
+        {"a": [float("nan"), float("inf"), -float("inf")]},
+        {"a": 2**70},
+    ],
+)
+def test_dumps_matches_json(schema, monkeypatch):
+    pytest.importorskip("orjson")
+    expected = cli._dumps(schema)
+    monkeypatch.setattr(cli, "orjson", None)
+    assert expected == cli._dumps(schema) == json.dumps(schema, indent=2)
@@ -1,10 +1,16 @@
 from __future__ import annotations
 
+import collections
+import copy
 import datetime
 import dataclasses
+import pickle
+import sys
 import typing as t
 import enum
+import json
 
+import pytest
 from jsonschema.validators import Draft202012Validator
 
 from dc_schema import (
@@ -97,6 +103,32 @@ def test_get_schema_union():
     }
 
 
+@dataclasses.dataclass
+class DcUnionType:
+    a: int | str
+    b: int | None = None
+
+
+@pytest.mark.skipif(sys.version_info < (3, 10), reason="requires python 3.10+")
+def test_get_schema_union_type():
+    schema = get_schema(DcUnionType)
+    print(schema)
+    Draft202012Validator.check_schema(schema)
+    assert schema == {
+        "$schema": "https://json-schema.org/draft/2020-12/schema",
+        "type": "object",
+        "title": "DcUnionType",
+        "properties": {
+            "a": {"anyOf": [{"type": "integer"}, {"type": "string"}]},
+            "b": {
+                "anyOf": [{"type": "integer"}, {"type": "null"}],
+                "default": None,
+            },
+        },
+        "required": ["a"],
+    }
+
+
 @dataclasses.dataclass
 class DcNone:
     a: None
@@ -310,6 +342,48 @@ def test_get_schema_enum():
     }
 
 
+@dataclasses.dataclass
+class DcJsonDefaults:
+    a: t.Optional[MyEnum] = MyEnum.b
+    b: t.Optional[tuple[int, MyEnum]] = (1, MyEnum.a)
+    c: t.Literal[MyEnum.a, 2] = MyEnum.a
+
+
+def test_get_schema_json_defaults():
+    schema = get_schema(DcJsonDefaults)
+    print(schema)
+    Draft202012Validator.check_schema(schema)
+    json.dumps(schema)
+    assert schema == {
+        "$schema": "https://json-schema.org/draft/2020-12/schema",
+        "type": "object",
+        "title": "DcJsonDefaults",
+        "properties": {
+            "a": {
+                "anyOf": [{"allOf": [{"$ref": "#/$defs/MyEnum"}]}, {"type": "null"}],
+                "default": 2,
+            },
+            "b": {
+                "anyOf": [
+                    {
+                        "type": "array",
+                        "prefixItems": [
+                            {"type": "integer"},
+                            {"allOf": [{"$ref": "#/$defs/MyEnum"}]},
+                        ],
+                        "minItems": 2,
+                        "maxItems": 2,
+                    },
+                    {"type": "null"},
+                ],
+                "default": [1, 1],
+            },
+            "c": {"enum": [1, 2], "default": 1},
+        },
+        "$defs": {"MyEnum": {"title": "MyEnum", "enum": [1, 2]}},
+    }
+
+
 @dataclasses.dataclass
 class DcSet:
     a: set
@@ -572,3 +646,154 @@ def test_get_schema_list_annotation():
         },
         "required": ["a"],
     }
+
+
+def test_get_schema_returns_copy():
+    schema = get_schema(DcRefs)
+    schema["properties"]["a"]["description"] = "mutated"
+    schema["$defs"]["DcRefsChild"]["required"].append("d")
+    assert get_schema(DcRefs) == {
+        "$schema": "https://json-schema.org/draft/2020-12/schema",
+        "type": "object",
+        "title": "DcRefs",
+        "properties": {
+            "a": {"allOf": [{"$ref": "#/$defs/DcRefsChild"}]},
+            "b": {
+                "type": "array",
+                "items": {"allOf": [{"$ref": "#/$defs/DcRefsChild"}]},
+            },
+        },
+        "required": ["a", "b"],
+        "$defs": {
+            "DcRefsChild": {
+                "type": "object",
+                "title": "DcRefsChild",
+                "properties": {"c": {"type": "string"}},
+                "required": ["c"],
+            }
+        },
+    }
+
+
+@dataclasses.dataclass
+class DcTupleExamples:
+    a: t.Annotated[list[int], SchemaAnnotation(examples=([1, 2],))]
+    b: t.Annotated[
+        dict, SchemaAnnotation(examples=[collections.OrderedDict(c=[3])])
+    ] = dataclasses.field(default_factory=dict)
+
+
+def test_get_schema_returns_copy_of_tuples():
+    schema = get_schema(DcTupleExamples)
+    schema["properties"]["a"]["examples"][0].append(99)
+    schema["properties"]["b"]["examples"][0]["c"].append(99)
+    schema = get_schema(DcTupleExamples)
+    assert schema["properties"]["a"]["examples"] == ([1, 2],)
+    assert schema["properties"]["b"]["examples"] == [{"c": [3]}]
+    assert type(schema["properties"]["b"]["examples"][0]) is dict
+
+
+def test_schema_annotation_schema_returns_copy():
+    annotation = SchemaAnnotation(title="foo", examples=[["a"]], min_length=1)
+    schema = annotation.schema()
+    schema["title"] = "bar"
+    schema["examples"].append(["b"])
+    schema["examples"][0].append("c")
+    assert annotation.examples == [["a"]]
+    assert annotation.schema() == {
+        "title": "foo",
+        "examples": [["a"]],
+        "minLength": 1,
+    }
+
+
+def test_schema_annotation_schema_returns_copy_of_tuples():
+    annotation = SchemaAnnotation(examples=([1, 2],))
+    annotation.schema()["examples"][0].append(99)
+    assert annotation.schema() == {"examples": ([1, 2],)}
+
+
+@dataclasses.dataclass
+class DcCopyAnnotation:
+    a: t.Annotated[str, SchemaAnnotation(title="foo", examples=[["a"]])]
+
+
+def test_schema_annotation_copy_and_pickle_after_get_schema():
+    get_schema(DcCopyAnnotation)
+    hint = t.get_type_hints(DcCopyAnnotation, include_extras=True)["a"]
+    (annotation,) = hint.__metadata__
+
+    for copied in (copy.deepcopy(annotation), pickle.loads(pickle.dumps(annotation))):
+        assert copied == annotation
+        assert copied.schema() == annotation.schema()
+    assert copy.deepcopy(hint).__metadata__ == (annotation,)
+
+
+def test_schema_annotation_schema_all_fields():
+    annotation = SchemaAnnotation(
+        **{field.name: field.name for field in dataclasses.fields(SchemaAnnotation)}
+    )
+    assert annotation.schema() == {
+        "title": "title",
+        "description": "description",
+        "examples": "examples",
+        "deprecated": "deprecated",
+        "minLength": "min_length",
+        "maxLength": "max_length",
+        "pattern": "pattern",
+        "format": "format",
+        "minimum": "minimum",
+        "maximum": "maximum",
+        "exclusiveMinimum": "exclusive_minimum",
+        "exclusiveMaximum": "exclusive_maximum",
+        "multipleOf": "multiple_of",
+        "minItems": "min_items",
+        "maxItems": "max_items",
+        "uniqueItems": "unique_items",
+    }
+
+
+@dataclasses.dataclass
+class DcNotImplemented:
+    a: t.Any
+
+
+def test_get_schema_not_implemented():
+    with pytest.raises(NotImplementedError):
+        get_schema(DcNotImplemented)
+
+
+def test_get_schema_refs_not_shared():
+    schema = get_schema(DcRefs)
+    schema["properties"]["a"]["allOf"].append({"type": "object"})
+    assert schema["properties"]["b"]["items"] == {
+        "allOf": [{"$ref": "#/$defs/DcRefsChild"}]
+    }
+
+
+@dataclasses.dataclass
+class DcAnnotatedOtherMetadata:
+    a: t.Annotated[int, "other"]
+    b: t.Annotated[int, "other", SchemaAnnotation(minimum=1)]
+
+
+def test_get_schema_annotated_other_metadata():
+    schema = get_schema(DcAnnotatedOtherMetadata)
+    print(schema)
+    Draft202012Validator.check_schema(schema)
+    assert schema == {
+        "$schema": "https://json-schema.org/draft/2020-12/schema",
+        "type": "object",
+        "title": "DcAnnotatedOtherMetadata",
+        "properties": {
+            "a": {"type": "integer"},
+            "b": {"type": "integer", "minimum": 1},
+        },
+        "required": ["a", "b"],
+    }
+
+
+def test_get_schema_primitives_not_shared():
+    schema = get_schema(DcNone)
+    schema["properties"]["b"]["anyOf"][0]["minimum"] = 0
+    assert schema["properties"]["c"]["anyOf"][1] == {"type": "integer"}